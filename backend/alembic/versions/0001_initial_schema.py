@@ -0,0 +1,126 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('characters',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('show_name', sa.String(length=255), nullable=False),
+    sa.Column('personality', sa.Text(), nullable=False),
+    sa.Column('speech_pattern', sa.Text(), nullable=False),
+    sa.Column('themes', sa.Text(), nullable=False),
+    sa.Column('system_prompt', sa.Text(), nullable=False),
+    sa.Column('voice_config', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('avatar_url', sa.String(length=500), nullable=True),
+    sa.Column('background_music_url', sa.String(length=500), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('parents',
+    sa.Column('email', sa.String(length=255), nullable=True),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('scenarios',
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('structure', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('example_prompt', sa.Text(), nullable=True),
+    sa.Column('icon', sa.String(length=50), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('children',
+    sa.Column('parent_id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('age', sa.Integer(), nullable=True),
+    sa.Column('interests', postgresql.ARRAY(sa.String()), nullable=True),
+    sa.Column('favorite_show', sa.String(length=255), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['parent_id'], ['parents.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('clips',
+    sa.Column('child_id', sa.UUID(), nullable=False),
+    sa.Column('character_id', sa.UUID(), nullable=False),
+    sa.Column('scenario_type', sa.String(length=50), nullable=False),
+    sa.Column('parent_note', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=30), nullable=False),
+    sa.Column('generated_script', sa.Text(), nullable=True),
+    sa.Column('scene_description', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('voice_params', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('safety_status', sa.String(length=20), nullable=True),
+    sa.Column('safety_feedback', sa.Text(), nullable=True),
+    sa.Column('safety_checks', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('audio_url', sa.String(length=500), nullable=True),
+    sa.Column('duration_seconds', sa.Float(), nullable=True),
+    sa.Column('generation_time_ms', sa.Integer(), nullable=True),
+    sa.Column('llm_tokens_used', sa.Integer(), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['character_id'], ['characters.id'], ),
+    sa.ForeignKeyConstraint(['child_id'], ['children.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('approvals',
+    sa.Column('clip_id', sa.UUID(), nullable=False),
+    sa.Column('approved', sa.Boolean(), nullable=False),
+    sa.Column('reviewer_note', sa.Text(), nullable=True),
+    sa.Column('reviewed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['clip_id'], ['clips.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('clip_id')
+    )
+    op.create_table('clip_assets',
+    sa.Column('clip_id', sa.UUID(), nullable=False),
+    sa.Column('audio_file_path', sa.String(length=500), nullable=False),
+    sa.Column('mixed_audio_path', sa.String(length=500), nullable=True),
+    sa.Column('duration_seconds', sa.Float(), nullable=True),
+    sa.Column('tts_provider', sa.String(length=50), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['clip_id'], ['clips.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('clip_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('clip_assets')
+    op.drop_table('approvals')
+    op.drop_table('clips')
+    op.drop_table('children')
+    op.drop_table('scenarios')
+    op.drop_table('parents')
+    op.drop_table('characters')
@@ -5,18 +5,34 @@ downloads them to a local folder, and returns metadata for the asset library.
 """
 
 import asyncio
-import json
 import logging
 import os
 import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
 
+import aiofiles
+import aiohttp
+import orjson
+import replicate
 from claude_agent_sdk import ClaudeAgentOptions, query
 
+from app.agents.json_extract import extract_first_json_array
 from app.core.config import settings
+from app.core.http import DOWNLOAD_CHUNK_SIZE, get_http_client
 
 logger = logging.getLogger(__name__)
 
+# Images larger than this (per the HEAD content-length) are not downloaded
+MAX_IMAGE_BYTES = 10_000_000
+
+# Leading magic bytes → extension for downloaded images (WebP is checked separately)
+IMAGE_SIGNATURES = {
+    b"\x89PNG": ".png",
+    b"\xff\xd8": ".jpg",
+    b"GIF8": ".gif",
+}
+
 AGENT_SYSTEM_PROMPT = """You are an image research assistant for StorySpark, a children's TV show clip studio.
 
 Your job is to find high-quality, family-friendly images related to children's TV shows, characters, and themes.
@@ -60,32 +76,12 @@ async def find_images(search_query: str, output_dir: str | None = None) -> list[
     Returns:
         List of image metadata dicts with url, title, source, category, relevance
     """
-    if output_dir is None:
-        output_dir = str(Path(settings.clip_storage_path) / "assets" / "images")
-
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = _ensure_output_dir("images", output_dir)
 
+    # Output format and image criteria live in AGENT_SYSTEM_PROMPT
     prompt = f"""Search the web for images related to: "{search_query}"
 
-Find 5-10 high-quality, family-friendly images that could be used as visual assets
-in a children's storytelling app. Focus on:
-- Official promotional art
-- Character illustrations
-- Scene/background images
-- Thematic imagery
-
-Return your findings as a JSON array with this exact format:
-[
-  {{
-    "url": "direct image URL",
-    "title": "description of what the image shows",
-    "source": "website where it was found",
-    "category": "character|scene|background|theme",
-    "relevance": "high|medium|low"
-  }}
-]
-
-IMPORTANT: Return ONLY the JSON array, no other text."""
+Return ONLY the JSON array, no other text."""
 
     images = []
 
@@ -94,122 +90,200 @@ IMPORTANT: Return ONLY the JSON array, no other text."""
         options=ClaudeAgentOptions(
             system_prompt=AGENT_SYSTEM_PROMPT,
             allowed_tools=["WebSearch", "WebFetch"],
-            max_turns=10,
+            max_turns=5,
         ),
     ):
         if hasattr(message, "result") and message.result:
+            logger.info(f"Image agent finished in {getattr(message, 'num_turns', '?')} turns")
             # Try to parse JSON from the result
             try:
-                result_text = message.result
                 # Extract JSON array from response
-                start = result_text.find("[")
-                end = result_text.rfind("]") + 1
-                if start >= 0 and end > start:
-                    images = json.loads(result_text[start:end])
-            except (json.JSONDecodeError, ValueError) as e:
+                array_text = extract_first_json_array(message.result)
+                if array_text:
+                    images = orjson.loads(array_text)
+            except ValueError as e:
                 logger.warning(f"Could not parse agent result as JSON: {e}")
 
-    # Download images to local storage
-    downloaded = []
-    import httpx
+    # Download images to local storage — all fetches run concurrently
+    if settings.image_download_backend == "aiohttp":
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, limit_per_host=4),
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as session:
+            downloaded = await _download_images(images, output_dir, _AiohttpDownloader(session))
+    else:
+        downloaded = await _download_images(images, output_dir, _HttpxDownloader())
 
-    async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
-        for img in images:
-            try:
-                url = img.get("url", "")
-                if not url or not url.startswith("http"):
-                    continue
-
-                response = await client.get(url)
-                if response.status_code == 200:
-                    content_type = response.headers.get("content-type", "")
-                    if "image" not in content_type:
-                        continue
-
-                    ext = ".jpg"
-                    if "png" in content_type:
-                        ext = ".png"
-                    elif "webp" in content_type:
-                        ext = ".webp"
-                    elif "gif" in content_type:
-                        ext = ".gif"
-
-                    filename = f"{uuid.uuid4()}{ext}"
+    # Save metadata
+    metadata_path = os.path.join(output_dir, "metadata.json")
+    await asyncio.to_thread(Path(metadata_path).write_bytes, orjson.dumps(downloaded))
+
+    logger.info(f"Found {len(images)} images, downloaded {len(downloaded)}")
+    return downloaded
+
+
+async def _download_images(images: list[dict], output_dir: str, downloader) -> list[dict]:
+    """Download all image URLs concurrently; returns the saved images in the agent's order."""
+    sem = asyncio.Semaphore(16)
+
+    async def _fetch(img: dict) -> dict | None:
+        try:
+            url = img.get("url", "")
+            if not url or not url.startswith("http"):
+                return None
+
+            async with sem:
+                if not await _passes_head_check(downloader, url):
+                    return None
+
+                async with downloader.stream(url) as (status, chunks):
+                    if status != 200:
+                        return None
+
+                    # Trust the file signature over content-type, which is often wrong
+                    chunks = aiter(chunks)
+                    head = await anext(chunks, b"")
+                    ext = _sniff_image_ext(head)
+                    if ext is None:
+                        return None
+
+                    filename = f"{uuid.uuid4().hex}{ext}"
                     filepath = os.path.join(output_dir, filename)
 
-                    with open(filepath, "wb") as f:
-                        f.write(response.content)
+                    # Written under a temporary name and renamed once complete, so a
+                    # failed download never leaves a truncated image in the library
+                    tmp_path = f"{filepath}.part"
+                    try:
+                        async with aiofiles.open(tmp_path, "wb") as f:
+                            await f.write(head)
+                            async for chunk in chunks:
+                                await f.write(chunk)
+                        await asyncio.to_thread(os.replace, tmp_path, filepath)
+                    finally:
+                        await asyncio.to_thread(Path(tmp_path).unlink, missing_ok=True)
+
+            img["local_path"] = filepath
+            img["filename"] = filename
+            logger.info(f"Downloaded: {img.get('title', 'unknown')} -> {filename}")
+            return img
+
+        except Exception as e:
+            logger.warning(f"Failed to download {img.get('url', '?')}: {e}")
+            return None
+
+    # gather keeps input order, so the agent's relevance ranking survives
+    results = await asyncio.gather(*[_fetch(img) for img in images])
+    return [img for img in results if img is not None]
+
+
+def _sniff_image_ext(head: bytes) -> str | None:
+    """File extension from the image's magic bytes, or None if it isn't an image we keep."""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    for signature, ext in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return ext
+    return None
+
+
+async def _passes_head_check(downloader, url: str) -> bool:
+    """HEAD the URL so gallery pages and oversized files are skipped without a full GET.
+
+    Only a definite answer rejects the URL — hosts that fail or refuse HEAD still get
+    the GET, where the magic-byte sniff has the final say.
+    """
+    try:
+        status, headers = await downloader.head(url)
+    except Exception:
+        return True
+    if status != 200:
+        return True
 
-                    img["local_path"] = filepath
-                    img["filename"] = filename
-                    downloaded.append(img)
-                    logger.info(f"Downloaded: {img.get('title', 'unknown')} -> {filename}")
+    content_type = headers.get("content-type", "")
+    if content_type and "image/" not in content_type and "octet-stream" not in content_type:
+        return False
+    content_length = headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > MAX_IMAGE_BYTES:
+        return False
+    return True
 
-            except Exception as e:
-                logger.warning(f"Failed to download {img.get('url', '?')}: {e}")
 
-    # Save metadata
-    metadata_path = os.path.join(output_dir, "metadata.json")
-    with open(metadata_path, "w") as f:
-        json.dump(downloaded, f, indent=2)
+class _HttpxDownloader:
+    """find_images download backend on the shared httpx client."""
 
-    logger.info(f"Found {len(images)} images, downloaded {len(downloaded)}")
-    return downloaded
+    def __init__(self):
+        self.client = get_http_client()
+
+    async def head(self, url: str):
+        response = await self.client.head(url)
+        return response.status_code, response.headers
+
+    @asynccontextmanager
+    async def stream(self, url: str):
+        async with self.client.stream("GET", url) as response:
+            yield response.status_code, response.aiter_bytes(DOWNLOAD_CHUNK_SIZE)
+
+
+class _AiohttpDownloader:
+    """find_images download backend on an aiohttp session (IMAGE_DOWNLOAD_BACKEND=aiohttp)."""
+
+    def __init__(self, session: aiohttp.ClientSession):
+        self.session = session
+
+    async def head(self, url: str):
+        async with self.session.head(url, allow_redirects=True) as response:
+            return response.status, response.headers
+
+    @asynccontextmanager
+    async def stream(self, url: str):
+        async with self.session.get(url) as response:
+            yield response.status, response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE)
 
 
 async def generate_image(
     prompt: str,
     output_dir: str | None = None,
-) -> dict:
+    num_outputs: int = 1,
+) -> dict | list[dict]:
     """Generate an image using Replicate's nano-banana-pro model.
 
     Args:
         prompt: Image generation prompt
         output_dir: Where to save the generated image
+        num_outputs: Number of images to generate
 
     Returns:
-        Dict with local_path, filename, and prompt
+        Dict with local_path, filename, and prompt — or a list of them when the
+        model returns more than one image
     """
-    import replicate
-
-    if output_dir is None:
-        output_dir = str(Path(settings.clip_storage_path) / "assets" / "generated")
+    output_dir = _ensure_output_dir("generated", output_dir)
 
-    os.makedirs(output_dir, exist_ok=True)
-
-    output = await asyncio.to_thread(
-        replicate.run,
+    output = await replicate.async_run(
         "google/nano-banana-pro",
         input={
             "prompt": prompt,
-            "num_outputs": 1,
+            "num_outputs": num_outputs,
         },
     )
 
-    # Download the generated image
-    filename = f"{uuid.uuid4()}.png"
-    filepath = os.path.join(output_dir, filename)
-
-    import httpx
-
-    async with httpx.AsyncClient(follow_redirects=True, timeout=60.0) as client:
-        if isinstance(output, list) and len(output) > 0:
-            img_url = str(output[0])
-        else:
-            img_url = str(output)
-
-        response = await client.get(img_url)
-        response.raise_for_status()
-
-        with open(filepath, "wb") as f:
-            f.write(response.content)
-
-    return {
-        "local_path": filepath,
-        "filename": filename,
-        "prompt": prompt,
-        "model": "google/nano-banana-pro",
-    }
+    # Download the generated images concurrently
+    urls = [str(u) for u in output] if isinstance(output, list) else [str(output)]
+    filenames = [f"{uuid.uuid4().hex}.png" for _ in urls]
+    await asyncio.gather(*[
+        _download_one(url, os.path.join(output_dir, filename), timeout=60.0)
+        for url, filename in zip(urls, filenames)
+    ])
+
+    results = [
+        {
+            "local_path": os.path.join(output_dir, filename),
+            "filename": filename,
+            "prompt": prompt,
+            "model": "google/nano-banana-pro",
+        }
+        for filename in filenames
+    ]
+    return results[0] if len(results) == 1 else results
 
 
 async def generate_video(
@@ -225,37 +299,24 @@ async def generate_video(
     Returns:
         Dict with local_path, filename, and prompt
     """
-    import replicate
-
-    if output_dir is None:
-        output_dir = str(Path(settings.clip_storage_path) / "assets" / "videos")
-
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = _ensure_output_dir("videos", output_dir)
 
-    output = await asyncio.to_thread(
-        replicate.run,
+    output = await replicate.async_run(
         "google/veo-3.1",
         input={
             "prompt": prompt,
         },
     )
 
-    filename = f"{uuid.uuid4()}.mp4"
+    filename = f"{uuid.uuid4().hex}.mp4"
     filepath = os.path.join(output_dir, filename)
 
-    import httpx
-
-    async with httpx.AsyncClient(follow_redirects=True, timeout=120.0) as client:
-        if isinstance(output, list) and len(output) > 0:
-            vid_url = str(output[0])
-        else:
-            vid_url = str(output)
+    if isinstance(output, list) and len(output) > 0:
+        vid_url = str(output[0])
+    else:
+        vid_url = str(output)
 
-        response = await client.get(vid_url)
-        response.raise_for_status()
-
-        with open(filepath, "wb") as f:
-            f.write(response.content)
+    await _download_one(vid_url, filepath, timeout=120.0)
 
     return {
         "local_path": filepath,
@@ -263,3 +324,30 @@ async def generate_video(
         "prompt": prompt,
         "model": "google/veo-3.1",
     }
+
+
+def _ensure_output_dir(default_subdir: str, output_dir: str | None) -> str:
+    """The caller's output directory (created if needed), or the default asset subdirectory.
+
+    The default asset directories are created at startup.
+    """
+    if output_dir is None:
+        return str(Path(settings.clip_storage_path) / "assets" / default_subdir)
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+
+async def _download_one(url: str, filepath: str, timeout: float) -> None:
+    """Stream a single generated asset to disk over the shared client."""
+    # Same write-then-rename as _download_result, so no partial asset is ever listed
+    tmp_path = f"{filepath}.part"
+    client = get_http_client()
+    try:
+        async with client.stream("GET", url, timeout=timeout) as response:
+            response.raise_for_status()
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+        await asyncio.to_thread(os.replace, tmp_path, filepath)
+    finally:
+        await asyncio.to_thread(Path(tmp_path).unlink, missing_ok=True)
@@ -0,0 +1,60 @@
+"""Pull the JSON payload out of an agent's free-form reply.
+
+Kept free of SDK imports so it can be used (and tested) on its own.
+"""
+
+
+def extract_first_json_array(text: str) -> str | None:
+    """Return the first balanced top-level JSON array of objects in `text`, or None.
+
+    One pass over the text, tracking open brackets on a stack, so prose around the
+    JSON — including brackets that never close, like "[partial:", or a stray quote,
+    like '[5" tall]' — doesn't break it. A quote only opens a string where JSON
+    allows one (after "[", "{", "," or ":"), and only inside brackets.
+    """
+    opens: list[list] = []  # [position, is_array_of_objects] per unclosed "[" / "{"
+    pending: list[list] = []  # opened "[" still waiting for their first token
+    best: tuple[int, int] | None = None
+    in_string = False
+    escape = False
+    prev = ""
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                prev = ch
+            continue
+        if ch in " \t\r\n":
+            continue
+
+        # The first token after "[" decides whether it's an array of objects;
+        # "[[{" inherits from the inner bracket
+        if pending and ch != "[":
+            for entry in pending:
+                entry[1] = ch in "{]"
+            pending.clear()
+
+        if ch == '"' and opens and prev in "[{,:":
+            in_string = True
+        elif ch in "[{":
+            entry = [i, False]
+            opens.append(entry)
+            if ch == "[":
+                pending.append(entry)
+        elif ch in "]}" and opens:
+            start, is_array_of_objects = opens.pop()
+            if is_array_of_objects and text[start] == "[" and (best is None or start < best[0]):
+                best = (start, i + 1)
+            # Nothing earlier is still open, so no later array can start before this one
+            if not opens and best is not None:
+                break
+        prev = ch
+
+    if best is None:
+        return None
+    return text[best[0] : best[1]]
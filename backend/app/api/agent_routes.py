@@ -1,17 +1,19 @@
 """API routes for AI agent operations — with SSE streaming for live feedback."""
 
 import asyncio
-import json
 import os
-import uuid
 from pathlib import Path
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+import orjson
+from fastapi import APIRouter, Form, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from pydantic import BaseModel, computed_field
 from sse_starlette.sse import EventSourceResponse
 
+from app.agents.image_finder import find_images
 from app.core.config import settings
+from app.services.image_customizer import stream_customize_image
 
 router = APIRouter(prefix="/api/agents")
 
@@ -32,11 +34,32 @@ class ChildProfile(BaseModel):
     outfit: str = "red t-shirt and blue shorts"
     extra: str = ""
 
+    @computed_field
+    @property
+    def description(self) -> str:
+        """Prompt-ready description of the child character."""
+        desc = (
+            f"a {self.height} {self.age}-year-old {self.gender} named {self.name} with "
+            f"{self.hair_style} {self.hair_color} hair, {self.eye_color} eyes, "
+            f"{self.skin_tone} skin, wearing {self.outfit}"
+        )
+        if self.extra:
+            desc += f", {self.extra}"
+        return desc
+
 
 class ImageCustomizeRequest(BaseModel):
     scene_image_url: str  # URL of the asset to customize
     child_profile: ChildProfile
     mask_position: str = "center"
+    regenerate: bool = False  # ignore a previous result for the same inputs
+
+
+class ImageCustomizeForm(ChildProfile):
+    """Form body for the streaming customize endpoint — a flattened ImageCustomizeRequest."""
+    scene_image_url: str
+    mask_position: str = "center"
+    regenerate: bool = False
 
 
 # --- SSE Streaming Image Search ---
@@ -46,28 +69,27 @@ async def search_images_stream(query: str):
     """SSE stream: search for images with live agent feedback."""
 
     async def event_generator():
-        yield {"event": "status", "data": json.dumps({"step": "init", "detail": f"Starting search for: {query}"})}
+        yield {"event": "status", "data": orjson.dumps({"step": "init", "detail": f"Starting search for: {query}"}).decode()}
 
-        yield {"event": "status", "data": json.dumps({"step": "agent_start", "detail": "Claude Agent is browsing the web..."})}
+        yield {"event": "status", "data": orjson.dumps({"step": "agent_start", "detail": "Claude Agent is browsing the web..."}).decode()}
 
         # Run the agent
         try:
-            from app.agents.image_finder import find_images
             images = await find_images(query)
 
-            yield {"event": "status", "data": json.dumps({
+            yield {"event": "status", "data": orjson.dumps({
                 "step": "found",
                 "detail": f"Found {len(images)} images, downloading...",
-            })}
+            }).decode()}
 
-            yield {"event": "result", "data": json.dumps({
+            yield {"event": "result", "data": orjson.dumps({
                 "step": "complete",
                 "images": images,
                 "count": len(images),
-            })}
+            }).decode()}
 
         except Exception as e:
-            yield {"event": "error", "data": json.dumps({"step": "error", "detail": str(e)})}
+            yield {"event": "error", "data": orjson.dumps({"step": "error", "detail": str(e)}).decode()}
 
     return EventSourceResponse(event_generator())
 
@@ -75,41 +97,21 @@ async def search_images_stream(query: str):
 # --- SSE Streaming Image Customization ---
 
 @router.post("/images/customize/stream")
-async def customize_image_stream(
-    scene_image_url: str = Form(...),
-    name: str = Form("Thomas"),
-    gender: str = Form("boy"),
-    hair_color: str = Form("brown"),
-    hair_style: str = Form("short and curly"),
-    eye_color: str = Form("blue"),
-    skin_tone: str = Form("light"),
-    height: str = Form("small"),
-    age: int = Form(4),
-    outfit: str = Form("red t-shirt and blue shorts"),
-    extra: str = Form(""),
-    mask_position: str = Form("center"),
-):
+async def customize_image_stream(form: Annotated[ImageCustomizeForm, Form()]):
     """SSE stream: customize an image by adding a child character."""
-
-    # Build child description
-    child_desc = (
-        f"a {height} {age}-year-old {gender} named {name} with {hair_style} {hair_color} hair, "
-        f"{eye_color} eyes, {skin_tone} skin, wearing {outfit}"
-    )
-    if extra:
-        child_desc += f", {extra}"
+    child_desc = form.description
 
     # Resolve the scene image to a local path
-    scene_path = _resolve_asset_path(scene_image_url)
+    scene_path = _resolve_asset_path(form.scene_image_url)
     if not scene_path or not Path(scene_path).exists():
-        raise HTTPException(400, f"Scene image not found: {scene_image_url}")
+        raise HTTPException(400, f"Scene image not found: {form.scene_image_url}")
 
     async def event_generator():
-        from app.services.image_customizer import stream_customize_image
-
-        async for update in stream_customize_image(scene_path, child_desc, mask_position):
+        async for update in stream_customize_image(
+            scene_path, child_desc, form.mask_position, regenerate=form.regenerate
+        ):
             event_type = "result" if update.get("step") == "complete" else "status"
-            yield {"event": event_type, "data": json.dumps(update)}
+            yield {"event": event_type, "data": orjson.dumps(update).decode()}
 
     return EventSourceResponse(event_generator())
 
@@ -119,7 +121,6 @@ async def customize_image_stream(
 @router.post("/images/search")
 async def search_images(request: ImageSearchRequest):
     """Search for images (non-streaming)."""
-    from app.agents.image_finder import find_images
     images = await find_images(request.query)
     return {"images": images, "count": len(images)}
 
@@ -127,24 +128,16 @@ async def search_images(request: ImageSearchRequest):
 @router.post("/images/customize")
 async def customize_image(request: ImageCustomizeRequest):
     """Customize an image (non-streaming)."""
-    from app.services.image_customizer import stream_customize_image
-
-    p = request.child_profile
-    child_desc = (
-        f"a {p.height} {p.age}-year-old {p.gender} named {p.name} with "
-        f"{p.hair_style} {p.hair_color} hair, "
-        f"{p.eye_color} eyes, {p.skin_tone} skin, "
-        f"wearing {p.outfit}"
-    )
-    if p.extra:
-        child_desc += f", {p.extra}"
+    child_desc = request.child_profile.description
 
     scene_path = _resolve_asset_path(request.scene_image_url)
     if not scene_path:
         raise HTTPException(400, "Scene image not found")
 
     result = None
-    async for update in stream_customize_image(scene_path, child_desc, request.mask_position):
+    async for update in stream_customize_image(
+        scene_path, child_desc, request.mask_position, regenerate=request.regenerate
+    ):
         if update.get("step") == "complete":
             result = update
 
@@ -153,57 +146,107 @@ async def customize_image(request: ImageCustomizeRequest):
 
 # --- Asset browsing ---
 
+IMAGE_ASSET_DIRS = ["images", "generated", "customized"]
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+
+# Last asset listing, reused until one of the asset directories or metadata.json
+# changes (adding/removing a file bumps the directory mtime).
+_asset_listing: dict = {"fingerprint": None, "images": []}
+
+
 @router.get("/assets/images")
 async def list_image_assets():
     """List all downloaded/generated/customized image assets."""
     assets_dir = Path(settings.clip_storage_path) / "assets"
+
+    fingerprint = _asset_fingerprint(assets_dir)
+    if fingerprint != _asset_listing["fingerprint"]:
+        _asset_listing["images"] = await asyncio.to_thread(_scan_image_assets, assets_dir)
+        _asset_listing["fingerprint"] = fingerprint
+
+    images = _asset_listing["images"]
+    return {"images": images, "count": len(images)}
+
+
+def _asset_fingerprint(assets_dir: Path) -> tuple:
+    """Mtimes of everything the asset listing depends on."""
+    paths = [assets_dir / subdir for subdir in IMAGE_ASSET_DIRS]
+    paths.append(assets_dir / "images" / "metadata.json")
+    fingerprint = []
+    for path in paths:
+        try:
+            fingerprint.append(os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+
+def _scan_image_assets(assets_dir: Path) -> list[dict]:
+    """Scan the asset directories in one pass and join in metadata.json."""
     images = []
 
-    for subdir in ["images", "generated", "customized"]:
+    for subdir in IMAGE_ASSET_DIRS:
         dir_path = assets_dir / subdir
         if not dir_path.exists():
             continue
-        for f in sorted(dir_path.iterdir(), key=lambda x: x.stat().st_mtime, reverse=True):
-            if f.suffix.lower() in [".jpg", ".jpeg", ".png", ".webp", ".gif"]:
-                images.append({
-                    "filename": f.name,
-                    "path": str(f),
-                    "category": subdir,
-                    "url": f"/api/agents/assets/file/{subdir}/{f.name}",
-                    "size_bytes": f.stat().st_size,
-                })
+        # DirEntry caches its stat result, so each file is stat'ed once
+        entries = [
+            e for e in os.scandir(dir_path)
+            if e.is_file() and Path(e.name).suffix.lower() in IMAGE_SUFFIXES
+        ]
+        entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        for e in entries:
+            images.append({
+                "filename": e.name,
+                "path": e.path,
+                "category": subdir,
+                "url": f"/api/agents/assets/file/{subdir}/{e.name}",
+                "size_bytes": e.stat().st_size,
+            })
 
     # Enrich with metadata if available
     metadata_path = assets_dir / "images" / "metadata.json"
     if metadata_path.exists():
-        with open(metadata_path) as mf:
-            meta_list = json.load(mf)
-            metadata = {m.get("filename", ""): m for m in meta_list}
-            for img in images:
-                if img["filename"] in metadata:
-                    img["title"] = metadata[img["filename"]].get("title")
-                    img["source"] = metadata[img["filename"]].get("source")
-                    img["relevance"] = metadata[img["filename"]].get("relevance")
+        meta_list = orjson.loads(metadata_path.read_bytes())
+        metadata = {m.get("filename", ""): m for m in meta_list}
+        for img in images:
+            if img["filename"] in metadata:
+                img["title"] = metadata[img["filename"]].get("title")
+                img["source"] = metadata[img["filename"]].get("source")
+                img["relevance"] = metadata[img["filename"]].get("relevance")
 
-    return {"images": images, "count": len(images)}
+    return images
 
 
 @router.get("/assets/file/{category}/{filename}")
-async def serve_asset_file(category: str, filename: str):
-    """Serve an asset file."""
+async def serve_asset_file(category: str, filename: str, request: Request):
+    """Serve an asset file, answering 304 when the client's cached copy is current."""
     if category not in ["images", "generated", "customized", "videos"]:
         raise HTTPException(400, "Invalid category")
 
     filepath = Path(settings.clip_storage_path) / "assets" / category / filename
-    if not filepath.exists():
+    try:
+        st = filepath.stat()
+    except FileNotFoundError:
         raise HTTPException(404, "File not found")
 
-    return FileResponse(str(filepath))
+    etag = f'W/"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    # Customized results are overwritten in place on regenerate, so browsers must
+    # revalidate them (a cheap 304 via the ETag) instead of caching for an hour
+    cache_control = "no-cache" if category == "customized" else "public, max-age=3600"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse handles Range requests and sets Accept-Ranges for video seeking
+    return FileResponse(str(filepath), headers=headers, stat_result=st)
 
 
 def _resolve_asset_path(url_or_path: str) -> str | None:
     """Resolve an asset URL like /api/agents/assets/file/images/xyz.jpg to a local path."""
     if url_or_path.startswith("/api/agents/assets/file/"):
+        # Drop a cache-busting query like ?v=... from a customize result URL
+        url_or_path = url_or_path.split("?", 1)[0]
         parts = url_or_path.replace("/api/agents/assets/file/", "").split("/", 1)
         if len(parts) == 2:
             return str(Path(settings.clip_storage_path) / "assets" / parts[0] / parts[1])
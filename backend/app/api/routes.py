@@ -24,6 +24,9 @@ from app.services.orchestrator import generate_clip
 
 router = APIRouter(prefix="/api")
 
+# Clip audio is MP3 from TTS, or WAV/MP3 after mixing (MIXED_AUDIO_FORMAT)
+AUDIO_MEDIA_TYPES = {".mp3": "audio/mpeg", ".wav": "audio/wav"}
+
 
 # --- Characters ---
 
@@ -157,7 +160,8 @@ async def get_clip_audio(clip_id: uuid.UUID, db: AsyncSession = Depends(get_db))
     if not Path(audio_path).exists():
         raise HTTPException(404, "Audio file not found on disk")
 
-    return FileResponse(audio_path, media_type="audio/mpeg")
+    media_type = AUDIO_MEDIA_TYPES.get(Path(audio_path).suffix, "audio/mpeg")
+    return FileResponse(audio_path, media_type=media_type)
 
 
 @router.post("/clips/{clip_id}/approve", response_model=ClipOut)
@@ -0,0 +1,31 @@
+"""Operational commands — `python -m app.cli <command>`."""
+
+import argparse
+import asyncio
+import logging
+
+from app.core.database import engine
+from app.seed import seed_data
+
+
+async def _seed():
+    try:
+        await seed_data()
+    finally:
+        await engine.dispose()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="StorySpark management commands")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("seed", help="Seed characters, scenarios, and the demo family (idempotent)")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "seed":
+        asyncio.run(_seed())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import anthropic
+
+from app.core.config import settings
+
+_anthropic: anthropic.AsyncAnthropic | None = None
+
+
+def get_anthropic_client() -> anthropic.AsyncAnthropic:
+    """Shared Anthropic client for script generation and safety review, so its pool stays warm."""
+    global _anthropic
+    if _anthropic is None:
+        _anthropic = anthropic.AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            max_retries=2,
+            timeout=30,
+        )
+    return _anthropic
+
+
+async def close_anthropic_client() -> None:
+    global _anthropic
+    if _anthropic is not None:
+        await _anthropic.close()
+        _anthropic = None
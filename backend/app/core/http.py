@@ -0,0 +1,26 @@
+import httpx
+
+# Downloads are streamed to disk in 64 KB chunks rather than buffered whole
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared outbound HTTP client — HTTP/2 with a keep-alive pool, reused across requests."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
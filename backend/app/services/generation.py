@@ -1,12 +1,10 @@
-"""Script generation service — single Claude API call with structured output."""
+"""Script generation service — single Claude API call with tool-use structured output."""
 
 import json
 import logging
 import time
 
-import anthropic
-
-from app.core.config import settings
+from app.core.clients import get_anthropic_client
 from app.models.models import Character, Scenario
 from app.schemas.schemas import GenerationResult
 
@@ -24,14 +22,15 @@ You write scripts that:
 7. Use ONLY positive reinforcement — never guilt, shame, threats, or conditional love
 8. End on a warm, positive note
 
-You respond with a JSON object containing the script and production metadata."""
-
-USER_PROMPT_TEMPLATE = """Generate a personalized clip script.
+You respond by calling the emit_clip tool with the script and production metadata."""
 
-CHARACTER: {character_name}
+# Stable per character, so it sits in the system prompt rather than the user message
+CHARACTER_PROMPT_TEMPLATE = """CHARACTER: {character_name}
 CHARACTER PERSONALITY: {personality}
 CHARACTER SPEECH PATTERN: {speech_pattern}
-CHARACTER THEMES: {themes}
+CHARACTER THEMES: {themes}"""
+
+USER_PROMPT_TEMPLATE = """Generate a personalized clip script.
 
 SCENARIO TYPE: {scenario_type}
 SCENARIO DESCRIPTION: {scenario_description}
@@ -42,16 +41,57 @@ CHILD'S AGE: {child_age}
 
 PARENT'S NOTE: {parent_note}
 
-Respond with ONLY valid JSON in this exact format:
-{{
-  "script": "The full script text that the character will speak aloud. Include natural pauses marked with ... and emotional cues in [brackets] like [warmly] or [excitedly].",
-  "voice_emotion": "The primary emotion for TTS (e.g., warm, excited, gentle, sleepy, encouraging)",
-  "voice_pacing": "The pacing for TTS (e.g., moderate, slow_and_gentle, upbeat)",
-  "scene_setting": "Brief description of the visual setting (e.g., Frog's sunny garden)",
-  "scene_mood": "The mood of the scene (e.g., cheerful, cozy, adventurous)",
-  "ambient_sounds": ["list", "of", "ambient", "sounds"],
-  "background_track": "Type of background music (e.g., gentle_acoustic, playful_piano, lullaby)"
-}}"""
+Call the emit_clip tool with the script and its production metadata."""
+
+# Structured output: the model must answer with an emit_clip tool call whose input
+# matches GenerationResult, so there is no free-form JSON to parse
+EMIT_CLIP_TOOL = {
+    "name": "emit_clip",
+    "description": "Return the personalized clip script and its production metadata.",
+    "input_schema": {
+        "type": "object",
+        "required": [
+            "script",
+            "voice_emotion",
+            "voice_pacing",
+            "scene_setting",
+            "scene_mood",
+            "ambient_sounds",
+            "background_track",
+        ],
+        "properties": {
+            "script": {
+                "type": "string",
+                "description": "The full script text that the character will speak aloud. Include natural pauses marked with ... and emotional cues in [brackets] like [warmly] or [excitedly].",
+            },
+            "voice_emotion": {
+                "type": "string",
+                "description": "The primary emotion for TTS (e.g., warm, excited, gentle, sleepy, encouraging)",
+            },
+            "voice_pacing": {
+                "type": "string",
+                "description": "The pacing for TTS (e.g., moderate, slow_and_gentle, upbeat)",
+            },
+            "scene_setting": {
+                "type": "string",
+                "description": "Brief description of the visual setting (e.g., Frog's sunny garden)",
+            },
+            "scene_mood": {
+                "type": "string",
+                "description": "The mood of the scene (e.g., cheerful, cozy, adventurous)",
+            },
+            "ambient_sounds": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "List of ambient sounds",
+            },
+            "background_track": {
+                "type": "string",
+                "description": "Type of background music (e.g., gentle_acoustic, playful_piano, lullaby)",
+            },
+        },
+    },
+}
 
 
 async def generate_script(
@@ -65,13 +105,15 @@ async def generate_script(
 
     Returns (result, tokens_used, time_ms).
     """
-    client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+    client = get_anthropic_client()
 
-    user_prompt = USER_PROMPT_TEMPLATE.format(
+    character_prompt = CHARACTER_PROMPT_TEMPLATE.format(
         character_name=character.name,
         personality=character.personality,
         speech_pattern=character.speech_pattern,
         themes=character.themes,
+    )
+    user_prompt = USER_PROMPT_TEMPLATE.format(
         scenario_type=scenario.type,
         scenario_description=scenario.description,
         scenario_structure=json.dumps(scenario.structure),
@@ -83,26 +125,25 @@ async def generate_script(
     start = time.time()
     response = await client.messages.create(
         model="claude-sonnet-4-5-20250929",
-        max_tokens=1024,
-        system=SYSTEM_PROMPT,
+        max_tokens=600,
+        # No cache_control: tools + system prompt + character block come to roughly
+        # 800-900 tokens, under Sonnet's 1024-token caching minimum, where a
+        # breakpoint is silently ignored
+        system=[
+            {"type": "text", "text": SYSTEM_PROMPT},
+            {"type": "text", "text": character_prompt},
+        ],
         messages=[{"role": "user", "content": user_prompt}],
+        tools=[EMIT_CLIP_TOOL],
+        tool_choice={"type": "tool", "name": "emit_clip"},
     )
     elapsed_ms = int((time.time() - start) * 1000)
 
-    raw_text = response.content[0].text
     tokens_used = response.usage.input_tokens + response.usage.output_tokens
 
-    # Parse JSON from response
-    try:
-        data = json.loads(raw_text)
-    except json.JSONDecodeError:
-        # Try to extract JSON from markdown code blocks
-        import re
-        match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", raw_text, re.DOTALL)
-        if match:
-            data = json.loads(match.group(1))
-        else:
-            raise ValueError(f"Could not parse generation response as JSON: {raw_text[:200]}")
-
-    result = GenerationResult(**data)
+    block = next((b for b in response.content if b.type == "tool_use"), None)
+    if block is None:
+        raise ValueError(f"Generation response had no emit_clip call (stop_reason={response.stop_reason})")
+
+    result = GenerationResult(**block.input)
     return result, tokens_used, elapsed_ms
@@ -1,28 +1,99 @@
 """Image Customizer — Gemini prompt crafting + Banana Pro generation via Replicate.
 
 Two-step pipeline:
-1. Gemini Flash analyzes the art style of the source image
-2. Gemini Flash crafts the perfect generation prompt
-3. Google Nano Banana Pro generates the new image with the scene as reference
+1. Gemini Flash analyzes the art style of the source image and crafts the perfect
+   generation prompt in a single structured-output call
+2. Google Nano Banana Pro generates the new image with the scene as reference
 """
 
 import asyncio
-import base64
+import hashlib
+import io
 import logging
+import mimetypes
 import os
 import uuid
+from functools import lru_cache
 from pathlib import Path
 from typing import AsyncGenerator
 
+import aiofiles
+import replicate
+from google import genai
+from google.genai import types
+from PIL import Image
+from pydantic import BaseModel
+
 from app.core.config import settings
+from app.core.http import DOWNLOAD_CHUNK_SIZE, get_http_client
 
 logger = logging.getLogger(__name__)
 
+# Token is passed per client rather than through the process environment
+_REPLICATE = replicate.Client(api_token=settings.replicate_api_token)
+
+
+@lru_cache(maxsize=1)
+def _gemini() -> genai.Client:
+    """Shared Gemini client, created on first use (the SDK rejects an empty API key)."""
+    return genai.Client(api_key=settings.gemini_api_key)
+
+
 PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 
+# Scene file extension → MIME type sent to Gemini alongside the image bytes
+MIME_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp"}
+
+# Gemini only judges style and composition, which survive downscaling; the
+# full-resolution scene is kept for Banana Pro
+GEMINI_IMAGE_MAX_SIDE = 768
+
+# Banana Pro renders at 2K, so larger reference uploads are only resized server-side
+BANANA_IMAGE_MAX_SIDE = 2048
+
+
+def _mime_for(suffix: str) -> str:
+    """MIME type for a scene file extension, defaulting to JPEG."""
+    return MIME_TYPES.get(suffix.lower(), "image/jpeg")
+
+
+def _downscale_for_gemini(image_bytes: bytes, mime_type: str) -> tuple[bytes, str]:
+    """Shrink the scene to GEMINI_IMAGE_MAX_SIDE on its longest side, as JPEG.
+
+    Returns (bytes, mime_type); images already small enough are passed through.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        if max(img.size) <= GEMINI_IMAGE_MAX_SIDE:
+            return image_bytes, mime_type
+        img.thumbnail((GEMINI_IMAGE_MAX_SIDE, GEMINI_IMAGE_MAX_SIDE))
+        buf = io.BytesIO()
+        img.convert("RGB").save(buf, format="JPEG", quality=85)
+    return buf.getvalue(), "image/jpeg"
+
+
+def _downscale_for_banana(image_bytes: bytes, mime_type: str) -> tuple[bytes, str]:
+    """Fit the scene within BANANA_IMAGE_MAX_SIDE, keeping it in a comparable format.
 
+    PNG sources and anything with transparency stay PNG; everything else is written
+    as high-quality JPEG, so a photo-like scene never grows into a large PNG.
+    Returns (bytes, mime_type); images already small enough are passed through.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        if max(img.size) <= BANANA_IMAGE_MAX_SIDE:
+            return image_bytes, mime_type
+        keep_png = img.format == "PNG" or img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        img.thumbnail((BANANA_IMAGE_MAX_SIDE, BANANA_IMAGE_MAX_SIDE), Image.LANCZOS)
+        buf = io.BytesIO()
+        if keep_png:
+            img.save(buf, format="PNG")
+            return buf.getvalue(), "image/png"
+        img.convert("RGB").save(buf, format="JPEG", quality=92)
+    return buf.getvalue(), "image/jpeg"
+
+
+@lru_cache(maxsize=32)
 def _load_prompt(name: str) -> str:
-    """Load a prompt template from the prompts/ directory."""
+    """Load a prompt template from the prompts/ directory (cached; templates don't change at runtime)."""
     path = PROMPTS_DIR / f"{name}.txt"
     return path.read_text().strip()
 
@@ -31,165 +102,154 @@ async def stream_customize_image(
     scene_image_path: str,
     child_description: str,
     mask_position: str = "center",
+    regenerate: bool = False,
 ) -> AsyncGenerator[dict, None]:
     """Stream the image customization pipeline with progress updates.
 
+    A finished result for identical inputs is reused unless `regenerate` is set,
+    in which case the pipeline runs again and replaces it.
+
     Yields dicts with: {"step": str, "status": str, "detail": str, "progress": float}
     Final yield includes: {"step": "complete", "result_url": str}
     """
     output_dir = Path(settings.clip_storage_path) / "assets" / "customized"
-    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Read the scene once; both Gemini steps and Banana Pro share it
+    image_bytes = await asyncio.to_thread(Path(scene_image_path).read_bytes)
+
+    # Identical inputs reuse the earlier result instead of re-running the pipeline
+    result_path = output_dir / f"custom_{_result_key(image_bytes, child_description, mask_position)}.png"
+    if not regenerate and await asyncio.to_thread(result_path.exists):
+        yield _complete_event(result_path, "Reused the character you already added to this scene!")
+        return
+
+    mime_type = _mime_for(Path(scene_image_path).suffix)
+    (gemini_bytes, gemini_mime), (banana_bytes, banana_mime) = await asyncio.gather(
+        asyncio.to_thread(_downscale_for_gemini, image_bytes, mime_type),
+        asyncio.to_thread(_downscale_for_banana, image_bytes, mime_type),
+    )
 
     # Step 1: Analyze art style with Gemini
     yield {"step": "style_analysis", "status": "running", "detail": "Gemini is analyzing the art style of the scene...", "progress": 0.15}
 
-    art_style = await _analyze_art_style(scene_image_path)
+    # Style analysis and prompt crafting come from one Gemini call
+    art_style, final_prompt = await _analyze_and_craft(child_description, mask_position, gemini_bytes, gemini_mime)
 
     yield {"step": "style_analysis", "status": "done", "detail": f"Style detected: {art_style[:100]}...", "progress": 0.3}
 
-    # Step 2: Ask Gemini to craft the perfect prompt
+    # Step 2: The prompt was crafted in the same call
     yield {"step": "prompt", "status": "running", "detail": "Gemini is crafting the perfect generation prompt...", "progress": 0.35}
 
-    final_prompt = await _craft_prompt(child_description, art_style, mask_position, scene_image_path)
-
     # Save the prompt for debugging/iteration
-    prompt_log_path = output_dir / f"prompt_{uuid.uuid4()}.txt"
-    prompt_log_path.write_text(
-        f"Child: {child_description}\n\n"
-        f"Style: {art_style}\n\n"
-        f"Position: {mask_position}\n\n"
-        f"Final prompt:\n{final_prompt}"
-    )
+    if settings.debug_prompts:
+        prompt_log_path = output_dir / f"prompt_{uuid.uuid4()}.txt"
+        await asyncio.to_thread(
+            prompt_log_path.write_text,
+            f"Child: {child_description}\n\n"
+            f"Style: {art_style}\n\n"
+            f"Position: {mask_position}\n\n"
+            f"Final prompt:\n{final_prompt}",
+        )
 
     yield {"step": "prompt", "status": "done", "detail": f"Prompt: {final_prompt[:120]}...", "progress": 0.45}
 
     # Step 3: Generate with Banana Pro using scene as reference
     yield {"step": "generating", "status": "running", "detail": "Banana Pro is generating your character in the scene...", "progress": 0.5}
 
-    result_url = await _run_banana_pro(scene_image_path, final_prompt)
+    result_url = await _run_banana_pro(banana_bytes, banana_mime, final_prompt)
 
     yield {"step": "generating", "status": "done", "detail": "Generation complete!", "progress": 0.85}
 
     # Step 4: Download result
     yield {"step": "download", "status": "running", "detail": "Downloading generated image...", "progress": 0.9}
 
-    local_path = await _download_result(result_url, output_dir)
+    await _download_result(result_url, result_path)
 
     yield {"step": "download", "status": "done", "detail": "Image saved", "progress": 0.95}
 
     # Done
-    filename = Path(local_path).name
-    yield {
-        "step": "complete",
-        "status": "done",
-        "detail": "Your character has been added to the scene!",
-        "progress": 1.0,
-        "result_url": f"/api/agents/assets/file/customized/{filename}",
-        "result_path": local_path,
-    }
+    yield _complete_event(result_path, "Your character has been added to the scene!")
 
 
-async def _analyze_art_style(image_path: str) -> str:
-    """Use Gemini to analyze the art style of an image."""
-    from google import genai
+def _result_key(image_bytes: bytes, child_description: str, position: str) -> str:
+    """Hash of everything that determines a customization's output."""
+    h = hashlib.blake2b(image_bytes, digest_size=16)
+    for part in (" ".join(child_description.split()).casefold(), position):
+        h.update(b"\0")
+        h.update(part.encode())
+    return h.hexdigest()
 
-    client = genai.Client(api_key=settings.gemini_api_key)
 
-    with open(image_path, "rb") as f:
-        image_bytes = f.read()
+def _complete_event(result_path: Path, detail: str) -> dict:
+    # A regenerated result overwrites the same file, so the URL carries its mtime
+    # to tell browsers the content changed
+    version = result_path.stat().st_mtime_ns
+    return {
+        "step": "complete",
+        "status": "done",
+        "detail": detail,
+        "progress": 1.0,
+        "result_url": f"/api/agents/assets/file/customized/{result_path.name}?v={version:x}",
+        "result_path": str(result_path),
+    }
 
-    image_b64 = base64.b64encode(image_bytes).decode()
 
-    ext = Path(image_path).suffix.lower()
-    mime_map = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp"}
-    mime_type = mime_map.get(ext, "image/jpeg")
+class _CustomizePlan(BaseModel):
+    """Structured output of the combined style-analysis + prompt-crafting call."""
 
-    style_prompt = _load_prompt("style_analysis")
-
-    response = await asyncio.to_thread(
-        client.models.generate_content,
-        model="gemini-2.0-flash",
-        contents=[
-            {
-                "parts": [
-                    {
-                        "inline_data": {
-                            "mime_type": mime_type,
-                            "data": image_b64,
-                        }
-                    },
-                    {"text": style_prompt}
-                ]
-            }
-        ],
-    )
-
-    return response.text.strip()
+    art_style: str
+    final_prompt: str
 
 
-async def _craft_prompt(
+async def _analyze_and_craft(
     child_description: str,
-    art_style: str,
     position: str,
-    scene_image_path: str,
-) -> str:
-    """Use Gemini to craft the perfect generation prompt for Banana Pro."""
-    from google import genai
-
-    client = genai.Client(api_key=settings.gemini_api_key)
-
-    # Load the scene image so Gemini can see what it's working with
-    with open(scene_image_path, "rb") as f:
-        image_bytes = f.read()
+    image_bytes: bytes,
+    mime_type: str,
+) -> tuple[str, str]:
+    """Use one Gemini call to analyze the scene's art style and craft the Banana Pro prompt.
 
-    image_b64 = base64.b64encode(image_bytes).decode()
-    ext = Path(scene_image_path).suffix.lower()
-    mime_map = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp"}
-    mime_type = mime_map.get(ext, "image/jpeg")
+    The scene image is sent (and billed) once instead of once per step.
+    Returns (art_style, final_prompt).
+    """
+    client = _gemini()
 
-    system_prompt = _load_prompt("scene_composite")
+    system_prompt = _load_prompt("style_and_composite")
 
     user_message = (
         f"Here is the reference scene image. I want to add a character to it.\n\n"
         f"Character description: {child_description}\n\n"
-        f"Art style analysis of this scene: {art_style}\n\n"
-        f"Character position: {position}\n\n"
-        f"Craft the generation prompt now."
+        f"Character position: {position}"
     )
 
     response = await asyncio.to_thread(
         client.models.generate_content,
         model="gemini-2.0-flash",
         contents=[
-            {
-                "parts": [
-                    {
-                        "inline_data": {
-                            "mime_type": mime_type,
-                            "data": image_b64,
-                        }
-                    },
-                    {"text": f"{system_prompt}\n\n---\n\n{user_message}"}
-                ]
-            }
+            types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
+            f"{system_prompt}\n\n---\n\n{user_message}",
         ],
+        config=types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=_CustomizePlan,
+        ),
     )
 
-    return response.text.strip()
+    plan = _CustomizePlan.model_validate_json(response.text)
+    return plan.art_style.strip(), plan.final_prompt.strip()
 
 
-async def _run_banana_pro(scene_path: str, prompt: str) -> str:
+async def _run_banana_pro(image_bytes: bytes, mime_type: str, prompt: str) -> str:
     """Run Banana Pro via Replicate with the scene as reference image."""
-    import replicate
-
-    os.environ["REPLICATE_API_TOKEN"] = settings.replicate_api_token
+    # Replicate takes the upload's filename and content type from .name
+    scene = io.BytesIO(image_bytes)
+    scene.name = f"scene{mimetypes.guess_extension(mime_type) or '.jpg'}"
 
-    output = await asyncio.to_thread(
-        replicate.run,
+    output = await _REPLICATE.async_run(
         "google/nano-banana-pro",
         input={
             "prompt": prompt,
-            "image_input": [open(scene_path, "rb")],
+            "image_input": [scene],
             "aspect_ratio": "match_input_image",
             "resolution": "2K",
             "output_format": "png",
@@ -202,17 +262,20 @@ async def _run_banana_pro(scene_path: str, prompt: str) -> str:
     return str(output)
 
 
-async def _download_result(url: str, output_dir: Path) -> str:
-    """Download the generated image from Replicate."""
-    import httpx
-
-    filename = f"custom_{uuid.uuid4()}.png"
-    filepath = output_dir / filename
-
-    async with httpx.AsyncClient(follow_redirects=True, timeout=60.0) as client:
-        response = await client.get(url)
-        response.raise_for_status()
-        with open(filepath, "wb") as f:
-            f.write(response.content)
-
-    return str(filepath)
+async def _download_result(url: str, filepath: Path) -> None:
+    """Download the generated image from Replicate over the shared client."""
+    # Written under a temporary name and renamed once complete, so a failed
+    # download never leaves a partial file where the result cache looks
+    tmp_path = filepath.with_suffix(f".{uuid.uuid4().hex}.part")
+
+    # Stream to disk in chunks rather than buffering the whole 2K PNG
+    client = get_http_client()
+    try:
+        async with client.stream("GET", url, timeout=60.0) as response:
+            response.raise_for_status()
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+        await asyncio.to_thread(os.replace, tmp_path, filepath)
+    finally:
+        await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
@@ -1,16 +1,18 @@
 """Clip generation orchestrator — coordinates the full pipeline."""
 
+import asyncio
 import logging
 import time
 import uuid
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
-from app.models.models import Character, Child, Clip, ClipAsset, ClipStatus, Scenario
+from app.models.models import Clip, ClipAsset, ClipStatus, Scenario
 from app.services.generation import generate_script
 from app.services.safety import review_safety
-from app.services.tts import mix_with_background, synthesize_speech
+from app.services.tts import load_background, mix_with_background, synthesize_speech
 
 logger = logging.getLogger(__name__)
 
@@ -20,18 +22,20 @@ async def generate_clip(clip_id: uuid.UUID, db: AsyncSession) -> Clip:
 
     Pipeline: Script Generation → Safety Review → TTS → Audio Mixing
     """
-    # Load clip with relationships
-    clip = await db.get(Clip, clip_id)
-    if not clip:
+    # Load clip, character, child and scenario in one round trip
+    result = await db.execute(
+        select(Clip, Scenario)
+        .outerjoin(Scenario, Scenario.type == Clip.scenario_type)
+        .where(Clip.id == clip_id)
+        .options(joinedload(Clip.character), joinedload(Clip.child))
+    )
+    row = result.first()
+    if not row:
         raise ValueError(f"Clip {clip_id} not found")
 
-    character = await db.get(Character, clip.character_id)
-    child = await db.get(Child, clip.child_id)
-
-    scenario_result = await db.execute(
-        select(Scenario).where(Scenario.type == clip.scenario_type)
-    )
-    scenario = scenario_result.scalar_one_or_none()
+    clip, scenario = row
+    character = clip.character
+    child = clip.child
     if not scenario:
         raise ValueError(f"Scenario type {clip.scenario_type} not found")
 
@@ -62,9 +66,8 @@ async def generate_clip(clip_id: uuid.UUID, db: AsyncSession) -> Clip:
             "background_track": generation_result.background_track,
         }
         clip.llm_tokens_used = tokens
-        await db.commit()
 
-        # Step 2: Safety review
+        # Step 2: Safety review — the script and the status change share one commit
         clip.status = ClipStatus.SAFETY_REVIEW
         await db.commit()
 
@@ -84,21 +87,25 @@ async def generate_clip(clip_id: uuid.UUID, db: AsyncSession) -> Clip:
             await db.commit()
             return clip
 
-        # Step 3: TTS synthesis
+        # Step 3: TTS synthesis — commits the safety verdict along with the status
         clip.status = ClipStatus.SYNTHESIZING
         await db.commit()
 
-        voice_path, duration = await synthesize_speech(
-            script=generation_result.script,
-            character_name=character.name,
-            voice_emotion=generation_result.voice_emotion,
-            voice_pacing=generation_result.voice_pacing,
+        # The background track decodes while ElevenLabs synthesizes the voice
+        (voice_path, duration), background = await asyncio.gather(
+            synthesize_speech(
+                script=generation_result.script,
+                character_name=character.name,
+                voice_emotion=generation_result.voice_emotion,
+                voice_pacing=generation_result.voice_pacing,
+            ),
+            load_background(generation_result.background_track),
         )
 
         # Step 4: Audio mixing
         final_path = await mix_with_background(
             voice_path=voice_path,
-            background_track=generation_result.background_track,
+            background=background,
         )
 
         # Save asset
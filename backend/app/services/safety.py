@@ -1,11 +1,8 @@
 """Safety Guardian service — reviews generated scripts for child safety."""
 
-import json
 import logging
 
-import anthropic
-
-from app.core.config import settings
+from app.core.clients import get_anthropic_client
 from app.schemas.schemas import SafetyResult
 
 logger = logging.getLogger(__name__)
@@ -27,7 +24,7 @@ You evaluate scripts against these mandatory safety rules:
 11. NO personal data beyond first name
 12. NO manipulation or coercion tactics
 
-Respond with ONLY valid JSON."""
+Respond by calling the safety_review tool."""
 
 SAFETY_REVIEW_TEMPLATE = """Review this script for child safety.
 
@@ -39,19 +36,49 @@ SCRIPT:
 {script}
 ---
 
-Evaluate against all safety rules and respond with this JSON format:
-{{
-  "approved": true/false,
-  "checks": {{
-    "age_appropriate_language": {{"pass": true/false, "note": "brief note"}},
-    "positive_framing": {{"pass": true/false, "note": "brief note"}},
-    "character_fidelity": {{"pass": true/false, "note": "brief note"}},
-    "emotional_safety": {{"pass": true/false, "note": "brief note"}},
-    "no_manipulation": {{"pass": true/false, "note": "brief note"}},
-    "warm_ending": {{"pass": true/false, "note": "brief note"}}
-  }},
-  "feedback": "Overall feedback or null if approved"
-}}"""
+Evaluate against all safety rules and call the safety_review tool with your verdict."""
+
+SAFETY_CHECKS = [
+    "age_appropriate_language",
+    "positive_framing",
+    "character_fidelity",
+    "emotional_safety",
+    "no_manipulation",
+    "warm_ending",
+]
+
+# Structured output: the verdict comes back as a safety_review tool call whose
+# input matches SafetyResult, so there is no free-form JSON to parse
+SAFETY_REVIEW_TOOL = {
+    "name": "safety_review",
+    "description": "Record the child-safety verdict for the script.",
+    "input_schema": {
+        "type": "object",
+        "required": ["approved", "checks", "feedback"],
+        "properties": {
+            "approved": {"type": "boolean"},
+            "checks": {
+                "type": "object",
+                "required": SAFETY_CHECKS,
+                "properties": {
+                    name: {
+                        "type": "object",
+                        "required": ["pass", "note"],
+                        "properties": {
+                            "pass": {"type": "boolean"},
+                            "note": {"type": "string", "description": "brief note"},
+                        },
+                    }
+                    for name in SAFETY_CHECKS
+                },
+            },
+            "feedback": {
+                "type": ["string", "null"],
+                "description": "Overall feedback or null if approved",
+            },
+        },
+    },
+}
 
 
 async def review_safety(
@@ -61,7 +88,7 @@ async def review_safety(
     child_name: str,
 ) -> SafetyResult:
     """Review a generated script for child safety."""
-    client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+    client = get_anthropic_client()
 
     prompt = SAFETY_REVIEW_TEMPLATE.format(
         character_name=character_name,
@@ -75,22 +102,17 @@ async def review_safety(
         max_tokens=512,
         system=SAFETY_SYSTEM_PROMPT,
         messages=[{"role": "user", "content": prompt}],
+        tools=[SAFETY_REVIEW_TOOL],
+        tool_choice={"type": "tool", "name": "safety_review"},
     )
 
-    raw = response.content[0].text
-    try:
-        data = json.loads(raw)
-    except json.JSONDecodeError:
-        import re
-        match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", raw, re.DOTALL)
-        if match:
-            data = json.loads(match.group(1))
-        else:
-            # If we can't parse safety response, fail safe — reject
-            return SafetyResult(
-                approved=False,
-                checks={},
-                feedback="Safety review response could not be parsed. Rejecting as precaution.",
-            )
-
-    return SafetyResult(**data)
+    block = next((b for b in response.content if b.type == "tool_use"), None)
+    if block is None:
+        # If we can't read the safety verdict, fail safe — reject
+        return SafetyResult(
+            approved=False,
+            checks={},
+            feedback="Safety review response could not be parsed. Rejecting as precaution.",
+        )
+
+    return SafetyResult(**block.input)
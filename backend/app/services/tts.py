@@ -1,13 +1,22 @@
 """Text-to-Speech service using ElevenLabs + audio mixing with pydub."""
 
+import asyncio
 import logging
 import re
 import uuid
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import httpx
+import aiofiles
+import numpy as np
+from mutagen.mp3 import MP3
 
 from app.core.config import settings
+from app.core.http import DOWNLOAD_CHUNK_SIZE, get_http_client
+
+if TYPE_CHECKING:
+    from pydub import AudioSegment
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +27,24 @@ VOICE_MAP: dict[str, str | None] = {
     "toad": None,   # Will use default from settings
 }
 
+# Scripts longer than two chunks are split at sentence boundaries and the
+# chunks synthesized in parallel, this many sentences per request
+TTS_SENTENCES_PER_CHUNK = 3
+
+# Stage directions like [warmly] are stripped before synthesis
+_STAGE_DIRECTION_RE = re.compile(r"\[.*?\]\s*")
+_SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Emotion → ElevenLabs style intensity (0-1)
+_STYLE_MAP = {
+    "warm": 0.4,
+    "excited": 0.7,
+    "gentle": 0.3,
+    "sleepy": 0.2,
+    "encouraging": 0.5,
+    "neutral": 0.3,
+}
+
 
 async def synthesize_speech(
     script: str,
@@ -31,66 +58,155 @@ async def synthesize_speech(
     """
     voice_id = VOICE_MAP.get(character_name.lower()) or settings.elevenlabs_voice_id
     clip_id = str(uuid.uuid4())
-    output_dir = Path(settings.clip_storage_path)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / f"{clip_id}.mp3"
+    output_path = Path(settings.clip_storage_path) / f"{clip_id}.mp3"
 
     # Clean script for TTS
     tts_input = _prepare_tts_input(script, voice_emotion, voice_pacing)
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
+    chunks = _split_tts_input(tts_input)
+    if len(chunks) == 1:
+        client = get_http_client()
+        async with client.stream(
+            "POST",
             f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
-            headers={
-                "xi-api-key": settings.elevenlabs_api_key,
-                "Content-Type": "application/json",
-            },
-            json={
-                "text": tts_input,
-                "model_id": "eleven_multilingual_v2",
-                "voice_settings": {
-                    "stability": 0.6,
-                    "similarity_boost": 0.8,
-                    "style": _emotion_to_style(voice_emotion),
-                    "use_speaker_boost": True,
-                },
-            },
+            headers=_elevenlabs_headers(),
+            json=_elevenlabs_payload(tts_input, voice_emotion),
             timeout=60.0,
-        )
-        response.raise_for_status()
-
-        with open(output_path, "wb") as f:
-            f.write(response.content)
+        ) as response:
+            response.raise_for_status()
+            async with aiofiles.open(output_path, "wb") as f:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+    else:
+        # MP3 frames are self-contained, so the parts concatenate without re-encoding
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(
+                    _synthesize_chunk(
+                        voice_id,
+                        text,
+                        voice_emotion,
+                        previous_text=" ".join(chunks[:i]) or None,
+                        next_text=" ".join(chunks[i + 1:]) or None,
+                    )
+                )
+                for i, text in enumerate(chunks)
+            ]
+        async with aiofiles.open(output_path, "wb") as f:
+            await f.write(b"".join(task.result() for task in tasks))
 
-    duration = _get_audio_duration(str(output_path))
+    duration = await asyncio.to_thread(_get_audio_duration, str(output_path))
     return str(output_path), duration
 
 
+async def _synthesize_chunk(
+    voice_id: str,
+    text: str,
+    voice_emotion: str,
+    previous_text: str | None,
+    next_text: str | None,
+) -> bytes:
+    """Synthesize one part of a long script; the surrounding text keeps prosody continuous."""
+    payload = _elevenlabs_payload(text, voice_emotion)
+    if previous_text:
+        payload["previous_text"] = previous_text
+    if next_text:
+        payload["next_text"] = next_text
+
+    response = await get_http_client().post(
+        f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
+        headers=_elevenlabs_headers(),
+        json=payload,
+        timeout=60.0,
+    )
+    response.raise_for_status()
+    return response.content
+
+
+def _elevenlabs_headers() -> dict:
+    return {
+        "xi-api-key": settings.elevenlabs_api_key,
+        "Content-Type": "application/json",
+    }
+
+
+def _elevenlabs_payload(text: str, voice_emotion: str) -> dict:
+    return {
+        "text": text,
+        "model_id": "eleven_multilingual_v2",
+        "voice_settings": {
+            "stability": 0.6,
+            "similarity_boost": 0.8,
+            "style": _emotion_to_style(voice_emotion),
+            "use_speaker_boost": True,
+        },
+    }
+
+
+def _split_tts_input(text: str) -> list[str]:
+    """Group sentences into chunks of TTS_SENTENCES_PER_CHUNK; short scripts stay whole."""
+    sentences = [s for s in _SENTENCE_BREAK_RE.split(text) if s]
+    if len(sentences) <= 2 * TTS_SENTENCES_PER_CHUNK:
+        return [text]
+    return [
+        " ".join(sentences[i : i + TTS_SENTENCES_PER_CHUNK])
+        for i in range(0, len(sentences), TTS_SENTENCES_PER_CHUNK)
+    ]
+
+
+async def load_background(background_track: str) -> "AudioSegment | None":
+    """Decode a background track, or None if it's missing or can't be decoded.
+
+    Independent of the voice, so callers can run it alongside synthesize_speech.
+    """
+    return await asyncio.to_thread(_load_background_sync, background_track)
+
+
+def _load_background_sync(background_track: str) -> "AudioSegment | None":
+    bg_path = Path(settings.clip_storage_path) / "backgrounds" / f"{background_track}.mp3"
+    if not bg_path.exists():
+        return None
+    try:
+        return _load_bg(background_track)
+    except Exception as e:
+        logger.warning(f"Could not load background track {background_track}: {e}")
+    return None
+
+
+@lru_cache(maxsize=32)
+def _load_bg(background_track: str) -> "AudioSegment":
+    """Decode a background track once per process; the tracks are static and few.
+
+    AudioSegment operations return new segments, so the cached one is safe to share.
+    """
+    from pydub import AudioSegment
+
+    bg_path = Path(settings.clip_storage_path) / "backgrounds" / f"{background_track}.mp3"
+    return AudioSegment.from_mp3(str(bg_path))
+
+
 async def mix_with_background(
     voice_path: str,
-    background_track: str,
+    background: "AudioSegment | None",
 ) -> str:
-    """Mix voice audio with background music/ambiance."""
-    try:
-        from pydub import AudioSegment
+    """Mix voice audio with a pre-decoded background track (see load_background)."""
+    if background is None:
+        return voice_path
+    # pydub decodes/encodes through ffmpeg — keep it off the event loop
+    return await asyncio.to_thread(_mix_with_background_sync, voice_path, background)
 
-        voice = AudioSegment.from_mp3(voice_path)
 
-        bg_path = Path(settings.clip_storage_path) / "backgrounds" / f"{background_track}.mp3"
-        if bg_path.exists():
-            background = AudioSegment.from_mp3(str(bg_path))
-            background = background - 18  # reduce by 18dB
-            if len(background) < len(voice):
-                loops_needed = (len(voice) // len(background)) + 1
-                background = background * loops_needed
-            background = background[: len(voice)]
+def _mix_with_background_sync(voice_path: str, background: "AudioSegment") -> str:
+    try:
+        from pydub import AudioSegment
 
-            mixed = background.overlay(voice)
-            mixed = mixed.fade_in(1000).fade_out(2000)
+        mixed = _mix_segments(AudioSegment.from_mp3(voice_path), background)
 
-            output_path = voice_path.replace(".mp3", "_mixed.mp3")
-            mixed.export(output_path, format="mp3")
-            return output_path
+        # WAV is a raw PCM dump; MP3 costs a full lossy re-encode
+        fmt = settings.mixed_audio_format
+        output_path = voice_path.replace(".mp3", f"_mixed.{fmt}")
+        mixed.export(output_path, format=fmt)
+        return output_path
 
     except Exception as e:
         logger.warning(f"Could not mix audio: {e}")
@@ -98,28 +214,71 @@ async def mix_with_background(
     return voice_path
 
 
+def _mix_segments(voice: "AudioSegment", background: "AudioSegment") -> "AudioSegment":
+    """Background at -18 dB under the voice, looped to its length, faded in and out."""
+    voice = voice.set_sample_width(2)
+
+    # Match the voice's sample format so the two buffers can be summed directly
+    background = background.set_frame_rate(voice.frame_rate).set_channels(voice.channels)
+    background = _loop_to_length(background, len(voice))
+
+    return _mix_pcm(voice, background, background_gain_db=-18, fade_in_ms=1000, fade_out_ms=2000)
+
+
+def _loop_to_length(segment: "AudioSegment", duration_ms: int) -> "AudioSegment":
+    """Loop (or trim) a segment to exactly duration_ms with a single buffer fill."""
+    segment = segment.set_sample_width(2)
+    samples = np.frombuffer(segment.raw_data, dtype=np.int16)
+    target = int(duration_ms * segment.frame_rate / 1000) * segment.channels
+    return segment._spawn(np.resize(samples, target).tobytes())
+
+
+def _mix_pcm(
+    voice: "AudioSegment",
+    background: "AudioSegment",
+    background_gain_db: float,
+    fade_in_ms: int,
+    fade_out_ms: int,
+) -> "AudioSegment":
+    """Overlay background under voice and fade the result, as one vectorized pass.
+
+    Both segments must be 16-bit PCM with the same frame rate and channel count.
+    Samples are summed in wider precision and saturated back to int16.
+    """
+    v = np.frombuffer(voice.raw_data, dtype=np.int16)
+    b = np.resize(np.frombuffer(background.raw_data, dtype=np.int16), v.size)
+    mixed = v.astype(np.float32) + b.astype(np.float32) * np.float32(10 ** (background_gain_db / 20))
+
+    # Linear-amplitude fade envelope, one value per frame
+    frames = v.size // voice.channels
+    envelope = np.ones(frames, dtype=np.float32)
+    fade_in = min(frames, voice.frame_rate * fade_in_ms // 1000)
+    fade_out = min(frames, voice.frame_rate * fade_out_ms // 1000)
+    envelope[:fade_in] *= np.linspace(0.0, 1.0, fade_in, endpoint=False, dtype=np.float32)
+    envelope[frames - fade_out:] *= np.linspace(1.0, 0.0, fade_out, dtype=np.float32)
+    mixed = mixed.reshape(frames, voice.channels) * envelope[:, None]
+
+    return voice._spawn(np.clip(mixed, -32768, 32767).astype(np.int16).tobytes())
+
+
 def _prepare_tts_input(script: str, emotion: str, pacing: str) -> str:
     """Clean script for TTS — remove stage directions, keep pauses."""
-    cleaned = re.sub(r"\[.*?\]\s*", "", script)
+    cleaned = _STAGE_DIRECTION_RE.sub("", script)
     cleaned = cleaned.replace("...", ", ,")
     return cleaned.strip()
 
 
 def _emotion_to_style(emotion: str) -> float:
     """Map emotion to ElevenLabs style intensity (0-1)."""
-    style_map = {
-        "warm": 0.4,
-        "excited": 0.7,
-        "gentle": 0.3,
-        "sleepy": 0.2,
-        "encouraging": 0.5,
-        "neutral": 0.3,
-    }
-    return style_map.get(emotion, 0.4)
+    return _STYLE_MAP.get(emotion, 0.4)
 
 
 def _get_audio_duration(path: str) -> float:
-    """Get audio duration in seconds."""
+    """Get audio duration in seconds from the MP3 frame headers, without decoding."""
+    try:
+        return MP3(path).info.length
+    except Exception:
+        pass
     try:
         from pydub import AudioSegment
         audio = AudioSegment.from_mp3(path)
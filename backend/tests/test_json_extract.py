@@ -0,0 +1,28 @@
+import pytest
+
+from app.agents.json_extract import extract_first_json_array
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ('[{"url":"a"}]', '[{"url":"a"}]'),
+        ('Here you go:\n[{"url":"a"}]\nEnjoy!', '[{"url":"a"}]'),
+        ('See [below] for [{"url":"a"}]', '[{"url":"a"}]'),
+        ('Results [partial:\n[{"url":"x"}]', '[{"url":"x"}]'),
+        ('I found [5" tall] pics [{"url":"y"}]', '[{"url":"y"}]'),
+        ('[{"title":"a [b] \\"c\\"","tags":[1]}] then [{"url":"z"}]', '[{"title":"a [b] \\"c\\"","tags":[1]}]'),
+        ('[[{"url":"a"}]]', '[[{"url":"a"}]]'),
+        ("[]", "[]"),
+        ("no array here", None),
+    ],
+)
+def test_extract_first_json_array(text, expected):
+    assert extract_first_json_array(text) == expected
+
+
+def test_extract_first_json_array_is_linear_in_unmatched_brackets():
+    text = "[" * 20_000 + ' [{"url":"x"}]'
+    assert extract_first_json_array(text) == '[{"url":"x"}]'
+    text = "see [ " * 20_000 + '[{"url":"x"}]'
+    assert extract_first_json_array(text) == '[{"url":"x"}]'
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from pydub import AudioSegment
+
+from app.services.tts import TTS_SENTENCES_PER_CHUNK, _loop_to_length, _mix_segments, _split_tts_input
+
+RATE = 24_000
+
+
+def _segment(seconds: float, channels: int = 1, amplitude: int = 8000, seed: int = 0) -> AudioSegment:
+    rng = np.random.default_rng(seed)
+    samples = rng.integers(-amplitude, amplitude, int(seconds * RATE) * channels, dtype=np.int16)
+    return AudioSegment(samples.tobytes(), frame_rate=RATE, sample_width=2, channels=channels)
+
+
+def _samples(segment: AudioSegment) -> np.ndarray:
+    return np.frombuffer(segment.raw_data, dtype=np.int16).astype(np.int32)
+
+
+def _pydub_mix(voice: AudioSegment, background: AudioSegment) -> AudioSegment:
+    """The pure-pydub mix that _mix_segments replaced."""
+    background = background - 18
+    if len(background) < len(voice):
+        background = background * (len(voice) // len(background) + 1)
+    background = background[: len(voice)]
+    return background.overlay(voice).fade_in(1000).fade_out(2000)
+
+
+def test_mix_matches_pydub():
+    voice = _segment(5.0, seed=1)
+    background = _segment(1.3, seed=2)
+
+    mixed = _mix_segments(voice, background)
+    expected = _pydub_mix(voice, background)
+
+    assert (mixed.channels, mixed.frame_rate, mixed.sample_width) == (1, RATE, 2)
+    assert len(mixed.raw_data) == len(expected.raw_data)
+    assert np.abs(_samples(mixed) - _samples(expected)).max() <= 16
+
+
+def test_mix_stereo_background_under_mono_voice():
+    voice = _segment(4.0, seed=3)
+    background = _segment(1.0, channels=2, seed=4)
+
+    mixed = _mix_segments(voice, background)
+    # pydub would upmix the result to stereo; the mix keeps the voice's layout
+    expected = _pydub_mix(voice, background.set_channels(1))
+
+    assert mixed.channels == 1
+    assert len(mixed.raw_data) == len(voice.raw_data)
+    assert np.abs(_samples(mixed) - _samples(expected)).max() <= 16
+
+
+def test_mix_saturates_instead_of_wrapping():
+    loud = AudioSegment(np.full(3 * RATE, 32000, dtype=np.int16).tobytes(), frame_rate=RATE, sample_width=2, channels=1)
+
+    samples = _samples(_mix_segments(loud, loud))
+
+    assert samples.min() >= 0
+    assert samples.max() == 32767
+
+
+@pytest.mark.parametrize("duration_ms", [250, 1000, 3700])
+def test_loop_to_length(duration_ms):
+    background = _segment(1.0, channels=2, seed=5)
+
+    looped = _loop_to_length(background, duration_ms)
+
+    assert looped.channels == 2
+    assert looped.frame_count() == duration_ms * RATE // 1000
+    source, result = _samples(background), _samples(looped)
+    assert np.array_equal(result, np.resize(source, result.size))
+
+
+def test_split_tts_input_keeps_short_scripts_whole():
+    text = " ".join(f"Sentence {i}." for i in range(2 * TTS_SENTENCES_PER_CHUNK))
+    assert _split_tts_input(text) == [text]
+
+
+def test_split_tts_input_groups_sentences():
+    sentences = [f"Sentence {i}!" if i % 2 else f"Sentence {i}." for i in range(2 * TTS_SENTENCES_PER_CHUNK + 1)]
+
+    chunks = _split_tts_input(" ".join(sentences))
+
+    assert chunks == [
+        " ".join(sentences[i : i + TTS_SENTENCES_PER_CHUNK])
+        for i in range(0, len(sentences), TTS_SENTENCES_PER_CHUNK)
+    ]
@@ -3,7 +3,7 @@ import { useQuery } from "@/hooks/useApi";
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import type { ImageAsset } from "@/types/api";
-import { Search, Paintbrush, Loader2, Check, AlertCircle, Image as ImageIcon, X, ChevronRight, UserPlus } from "lucide-react";
+import { Search, Paintbrush, Loader2, Check, AlertCircle, Image as ImageIcon, X, ChevronRight, UserPlus, RefreshCw } from "lucide-react";
 
 interface StreamEvent {
   step: string;
@@ -84,7 +84,9 @@ export default function AssetLibrary() {
   }
 
   // ---- Image Customization ----
-  async function handleCustomize() {
+  // A finished result for the same scene, child and position is reused unless
+  // regenerate is set, which asks the backend for a fresh image
+  async function handleCustomize(regenerate = false) {
     if (!selectedImage) return;
     setCustomizing(true);
     setCustomizeEvents([]);
@@ -103,6 +105,7 @@ export default function AssetLibrary() {
     formData.append("outfit", childProfile.outfit);
     formData.append("extra", childProfile.extra);
     formData.append("mask_position", maskPosition);
+    formData.append("regenerate", String(regenerate));
 
     try {
       const response = await fetch("/api/agents/images/customize/stream", {
@@ -368,13 +371,20 @@ export default function AssetLibrary() {
                 </div>
               )}
 
-              <Button onClick={handleCustomize} disabled={customizing} size="lg">
-                {customizing ? (
-                  <><Loader2 className="w-4 h-4 mr-2 animate-spin" /> Adding {childProfile.name} to the scene...</>
-                ) : (
-                  <><Paintbrush className="w-4 h-4 mr-2" /> Add {childProfile.name} to Scene</>
+              <div className="flex gap-3">
+                <Button onClick={() => handleCustomize()} disabled={customizing} size="lg">
+                  {customizing ? (
+                    <><Loader2 className="w-4 h-4 mr-2 animate-spin" /> Adding {childProfile.name} to the scene...</>
+                  ) : (
+                    <><Paintbrush className="w-4 h-4 mr-2" /> Add {childProfile.name} to Scene</>
+                  )}
+                </Button>
+                {customizeResult && !customizing && (
+                  <Button variant="outline" onClick={() => handleCustomize(true)} size="lg">
+                    <RefreshCw className="w-4 h-4 mr-2" /> Try Again
+                  </Button>
                 )}
-              </Button>
+              </div>
             </CardContent>
           </Card>
         )}